@@ -1,10 +1,17 @@
 """
 db_sqlite_case.py
 
-Handles SQLite database operations:
-- Initializes the database
-- Inserts processed messages
-- Deletes messages
+Handles SQLite database operations through apsw, a thin binding that
+passes parameters straight to SQLite and caches prepared statements:
+- Initializes the database (keeping existing data across restarts)
+- Inserts processed messages (one at a time or in batches, as dicts or row tuples)
+- Deletes messages (or the whole database, sidecars included)
+- Records how far each live data file has been read
+
+The database runs in WAL (write-ahead log) mode, so SQLite keeps
+two sidecar files next to the database while it is open:
+<db>-wal and <db>-shm. Both are managed by SQLite; do not delete them
+while a consumer is running.
 
 Example JSON message:
 {
@@ -21,12 +28,139 @@ Example JSON message:
 # Import Modules
 #####################################
 
+import atexit
 import os
 import pathlib
-import sqlite3
+import time
+from typing import Callable, Iterable
+
+import apsw
+
 import utils.utils_config as config
 from utils.utils_logger import logger
 
+# Milliseconds a connection waits on a locked database before giving up
+BUSY_TIMEOUT_MS = 5000
+
+# Attempts, and first backoff in seconds, for taking the write lock
+LOCK_RETRIES = 3
+LOCK_BACKOFF_SECS = 0.1
+
+# Failures of the database itself (locked, full, I/O), not of the rows;
+# a batch that hits one is kept and retried whole on a later cycle
+DATABASE_ERRORS = (apsw.BusyError, apsw.LockedError, apsw.FullError, apsw.IOError)
+
+# Bump when the schema changes and add a migration step in init_db()
+SCHEMA_VERSION = 2
+
+# Size of each connection's prepared-statement cache
+CACHED_STATEMENTS = 128
+
+# Fixed-shape statements, kept as constants so apsw's per-connection
+# statement cache (keyed by SQL text) always hits: each is compiled once
+# per connection, and every later row is only bound, stepped, and reset
+_INSERT_SQL = """
+    INSERT INTO streamed_messages (
+        message, author, timestamp, category, keyword_mentioned, message_length, length_category
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_SAVE_OFFSET_SQL = """
+    INSERT OR REPLACE INTO read_offsets (source, byte_offset, file_id) VALUES (?, ?, ?)
+"""
+
+# Open connections, keyed by resolved database path
+_CONNECTIONS: dict[str, apsw.Connection] = {}
+
+#####################################
+# Function to Get a Shared Connection
+#####################################
+
+def get_conn(db_path: pathlib.Path) -> apsw.Connection:
+    """
+    Return a persistent SQLite connection for the given database path.
+
+    The first call opens the connection and applies the per-connection
+    settings (busy timeout, synchronous, cache size, temp store); later
+    calls reuse it, so per-message inserts avoid the cost of connecting
+    and closing.
+    All connections are closed when the interpreter exits.
+
+    apsw connections are in autocommit mode; callers manage
+    transactions with explicit BEGIN/COMMIT statements.
+
+    Args:
+    - db_path (pathlib.Path): Path to the SQLite database file.
+
+    Returns:
+    - apsw.Connection: The shared connection for db_path.
+    """
+    key = str(pathlib.Path(db_path).resolve())
+    conn = _CONNECTIONS.get(key)
+    if conn is None:
+        conn = apsw.Connection(key, statementcachesize=CACHED_STATEMENTS)
+        conn.set_busy_timeout(BUSY_TIMEOUT_MS)
+
+        # These settings last only for this connection, not the file
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        conn.execute("PRAGMA cache_size=-8000;")
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        _CONNECTIONS[key] = conn
+        atexit.register(conn.close)
+    return conn
+
+#####################################
+# Function to Delete the Database Files
+#####################################
+
+def delete_db_files(db_path: pathlib.Path) -> None:
+    """
+    Delete the SQLite database file together with its WAL sidecars
+    (<db>-wal and <db>-shm). A stale WAL left by a crashed run would
+    otherwise be replayed into the next database created at this path.
+    Closes the shared connection for db_path first, if one is open.
+
+    Args:
+    - db_path (pathlib.Path): Path to the SQLite database file.
+    """
+    conn = _CONNECTIONS.pop(str(pathlib.Path(db_path).resolve()), None)
+    if conn is not None:
+        conn.close()
+    for suffix in ("", "-wal", "-shm"):
+        pathlib.Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+
+#####################################
+# Function to Roll Back an Open Transaction
+#####################################
+
+def _rollback(conn: apsw.Connection | None) -> None:
+    """Roll back the current transaction on conn, if there is one."""
+    if conn is not None and conn.in_transaction:
+        conn.execute("ROLLBACK")
+
+#####################################
+# Function to Start a Write Transaction
+#####################################
+
+def begin_immediate(conn: apsw.Connection) -> None:
+    """
+    Start a write transaction, taking the database write lock up front.
+
+    The busy timeout covers most contention; if the database is still
+    locked, retry a few times with exponential backoff before giving up.
+
+    Args:
+    - conn (apsw.Connection): Connection in autocommit mode.
+    """
+    for attempt in range(LOCK_RETRIES):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            return
+        except apsw.BusyError:
+            if attempt == LOCK_RETRIES - 1:
+                raise
+            logger.warning(f"Database is locked; retrying (attempt {attempt + 1}).")
+            time.sleep(LOCK_BACKOFF_SECS * 2 ** attempt)
+
 #####################################
 # Function to Initialize SQLite Database
 #####################################
@@ -34,7 +168,8 @@ from utils.utils_logger import logger
 def init_db(db_path: pathlib.Path):
     """
     Initialize the SQLite database by creating the 'streamed_messages' table
-    without the 'sentiment' column.
+    without the 'sentiment' column, plus the 'read_offsets' table.
+    Existing tables and rows are kept, so a restart does no rewrite.
 
     Args:
     - db_path (pathlib.Path): Path to the SQLite database file.
@@ -45,69 +180,270 @@ def init_db(db_path: pathlib.Path):
         # Ensure the directories exist
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            logger.info("SUCCESS: Got a cursor to execute SQL.")
-
-            # Drop the existing table if it exists
-            cursor.execute("DROP TABLE IF EXISTS streamed_messages;")
-
-            # Create a new table without the 'sentiment' column
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS streamed_messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    message TEXT,
-                    author TEXT,
-                    timestamp TEXT,
-                    category TEXT,
-                    keyword_mentioned TEXT,
-                    message_length INTEGER,
-                    length_category TEXT
-                )
-            """)
-
-            conn.commit()
+        conn = get_conn(db_path)
+        cursor = conn.cursor()
+        logger.info("SUCCESS: Got a cursor to execute SQL.")
+
+        # WAL mode is stored in the database file, so later connections inherit it;
+        # per-connection settings are applied in get_conn()
+        cursor.execute("PRAGMA journal_mode=WAL;")
+
+        # Create the table without the 'sentiment' column if it is missing
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS streamed_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                message TEXT,
+                author TEXT,
+                timestamp TEXT,
+                category TEXT,
+                keyword_mentioned TEXT,
+                message_length INTEGER,
+                length_category TEXT
+            )
+        """)
+
+        # Byte offset read so far from each live data file, and which
+        # file (identity, not just path) that offset belongs to
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS read_offsets (
+                source TEXT PRIMARY KEY,
+                byte_offset INTEGER NOT NULL,
+                file_id TEXT
+            )
+        """)
+
+        # Migrations from older schema versions go here
+        version = cursor.execute("PRAGMA user_version;").fetchone()[0]
+        if version < 2:
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(read_offsets);")}
+            if "file_id" not in columns:
+                cursor.execute("ALTER TABLE read_offsets ADD COLUMN file_id TEXT;")
+        if version < SCHEMA_VERSION:
+            cursor.execute(f"PRAGMA user_version={SCHEMA_VERSION};")
+            logger.info(f"Schema upgraded from version {version} to {SCHEMA_VERSION}.")
         logger.info(f"SUCCESS: Database initialized and table ready at {db_path}.")
     except Exception as e:
         logger.error(f"ERROR: Failed to initialize SQLite database at {db_path}: {e}")
 
 #####################################
-# Function to Insert a Processed Message
+# Function to Index Lookups by Message and Author
 #####################################
 
-def insert_message(message: dict, db_path: pathlib.Path) -> None:
+def create_lookup_index(db_path: pathlib.Path) -> None:
     """
-    Insert a processed message into the SQLite database.
+    Create an index on (message, author) so lookups by those columns
+    avoid a full table scan.
+
+    Not part of init_db(): each index adds a B-tree update to every
+    INSERT, and the streaming consumers never query by these columns.
+    Call this where such lookups happen (e.g., the tests in main()).
 
     Args:
-    - message (dict): The processed message to insert.
     - db_path (pathlib.Path): Path to the SQLite database file.
     """
-    logger.info("Calling SQLite insert_message() with:")
-    logger.info(f"{message=}")
-    logger.info(f"{db_path=}")
+    try:
+        conn = get_conn(db_path)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_msg_author ON streamed_messages(message, author);"
+        )
+        logger.info("SUCCESS: Lookup index idx_msg_author is ready.")
+    except Exception as e:
+        logger.error(f"ERROR: Failed to create lookup index: {e}")
+
+#####################################
+# Function to Insert a Batch of Rows
+#####################################
+
+def insert_rows_bulk(
+    rows: Iterable[tuple],
+    db_path: pathlib.Path,
+    conn: apsw.Connection | None = None,
+    source: str | None = None,
+    byte_offset: int = 0,
+    file_id: str | None = None,
+    retry_rows: Callable[[], Iterable[tuple]] | None = None,
+    skipped_rows: list | None = None,
+) -> bool:
+    """
+    Insert many rows into the SQLite database inside a single
+    transaction (one commit for the whole batch).
+
+    Each row is a tuple in column order: message, author, timestamp,
+    category, keyword_mentioned, message_length, length_category.
+    Rows may come from a generator; executemany() binds each one to
+    the cached INSERT statement and the batch is never materialized as a list.
+
+    If the batch fails for a reason other than the database itself
+    (see DATABASE_ERRORS) and retry_rows is given, the batch is inserted
+    again one row at a time, skipping rows that cannot be inserted.
+
+    Args:
+    - rows (Iterable[tuple]): The rows to insert.
+    - db_path (pathlib.Path): Path to the SQLite database file.
+    - conn (apsw.Connection, optional): Open connection to reuse.
+      Defaults to the shared connection from get_conn(db_path).
+    - source (str, optional): Live data file the rows were read from.
+      If given, byte_offset and file_id are saved for it in the same transaction.
+    - byte_offset (int): Offset in source just past the rows inserted.
+    - file_id (str, optional): Identity of the file at source, so a
+      recreated file at the same path is not resumed mid-way.
+    - retry_rows (callable, optional): Returns a fresh iterable of the
+      same rows, for the row-by-row retry.
+    - skipped_rows (list, optional): Receives each row skipped by the
+      row-by-row retry.
+
+    Returns:
+    - bool: True if the batch was committed, False if it was rolled back.
+    """
+    try:
+        if conn is None:
+            conn = get_conn(db_path)
+        changes_before = conn.total_changes()
+        begin_immediate(conn)
+        conn.executemany(_INSERT_SQL, rows)
+        inserted = conn.total_changes() - changes_before
+        if source is not None:
+            conn.execute(_SAVE_OFFSET_SQL, (source, byte_offset, file_id))
+        conn.execute("COMMIT")
+        if inserted > 0:
+            logger.info(f"Inserted {inserted} message(s) into the database.")
+        return True
+    except DATABASE_ERRORS as e:
+        _rollback(conn)
+        logger.error(f"ERROR: Failed to insert messages into the database: {e}")
+        return False
+    except Exception as e:
+        _rollback(conn)
+        logger.error(f"ERROR: Failed to insert messages into the database: {e}")
+        if retry_rows is None or conn is None:
+            return False
+
+    logger.warning("Retrying the batch one row at a time.")
+    try:
+        changes_before = conn.total_changes()
+        begin_immediate(conn)
+        for row in retry_rows():
+            try:
+                conn.execute(_INSERT_SQL, row)
+            except DATABASE_ERRORS:
+                raise
+            except Exception as e:
+                logger.error(f"ERROR: Skipping row that could not be inserted: {e}")
+                if skipped_rows is not None:
+                    skipped_rows.append(row)
+        inserted = conn.total_changes() - changes_before
+        if source is not None:
+            conn.execute(_SAVE_OFFSET_SQL, (source, byte_offset, file_id))
+        conn.execute("COMMIT")
+        logger.info(f"Inserted {inserted} message(s) into the database.")
+        return True
+    except Exception as e:
+        _rollback(conn)
+        logger.error(f"ERROR: Failed to insert messages into the database: {e}")
+        if skipped_rows is not None:
+            skipped_rows.clear()
+        return False
+
+#####################################
+# Function to Get the Saved Read Offset
+#####################################
+
+def get_read_offset(source: str, db_path: pathlib.Path) -> tuple:
+    """
+    Return the byte offset and file identity saved for a live data file.
+
+    Args:
+    - source (str): Live data file path, as passed to insert_rows_bulk().
+    - db_path (pathlib.Path): Path to the SQLite database file.
+
+    Returns:
+    - tuple: (offset to resume reading from, saved file_id or None).
+      (0, None) if nothing is saved.
+    """
+    try:
+        conn = get_conn(db_path)
+        row = conn.execute(
+            "SELECT byte_offset, file_id FROM read_offsets WHERE source = ?", (source,)
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, None)
+    except Exception as e:
+        logger.error(f"ERROR: Failed to read saved offset for {source}: {e}")
+        return 0, None
+
+#####################################
+# Function to Count Messages by Length Category
+#####################################
+
+def count_length_categories(db_path: pathlib.Path) -> dict:
+    """
+    Count stored messages per length category.
 
+    Args:
+    - db_path (pathlib.Path): Path to the SQLite database file.
+
+    Returns:
+    - dict: Count of messages for each length_category.
+    """
     try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO streamed_messages (
-                    message, author, timestamp, category, keyword_mentioned, message_length, length_category
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                message["message"],
-                message["author"],
-                message["timestamp"],
-                message["category"],
-                message["keyword_mentioned"],
-                message["message_length"],
-                message["length_category"]
-            ))
-
-            conn.commit()
-        logger.info("Inserted one message into the database.")
+        conn = get_conn(db_path)
+        return dict(conn.execute(
+            "SELECT length_category, COUNT(*) FROM streamed_messages GROUP BY length_category"
+        ))
     except Exception as e:
-        logger.error(f"ERROR: Failed to insert message into the database: {e}")
+        logger.error(f"ERROR: Failed to count messages by length category: {e}")
+        return {}
+
+#####################################
+# Function to Insert a Batch of Processed Messages
+#####################################
+
+def insert_messages_bulk(
+    messages: Iterable[dict], db_path: pathlib.Path, conn: apsw.Connection | None = None
+) -> bool:
+    """
+    Insert many processed messages into the SQLite database
+    inside a single transaction (one commit for the whole batch).
+
+    Args:
+    - messages (Iterable[dict]): The processed messages to insert.
+    - db_path (pathlib.Path): Path to the SQLite database file.
+    - conn (apsw.Connection, optional): Open connection to reuse.
+      Defaults to the shared connection from get_conn(db_path).
+
+    Returns:
+    - bool: True if the batch was committed, False if it was rolled back.
+    """
+    rows = (
+        (
+            message["message"],
+            message["author"],
+            message["timestamp"],
+            message["category"],
+            message["keyword_mentioned"],
+            message["message_length"],
+            message["length_category"]
+        )
+        for message in messages
+    )
+    return insert_rows_bulk(rows, db_path, conn)
+
+#####################################
+# Function to Insert a Processed Message
+#####################################
+
+def insert_message(
+    message: dict, db_path: pathlib.Path, conn: apsw.Connection | None = None
+) -> None:
+    """
+    Insert a processed message into the SQLite database.
+
+    Args:
+    - message (dict): The processed message to insert.
+    - db_path (pathlib.Path): Path to the SQLite database file.
+    - conn (apsw.Connection, optional): Open connection to reuse.
+      Defaults to the shared connection from get_conn(db_path).
+    """
+    insert_messages_bulk([message], db_path, conn)
 
 #####################################
 # Function to Delete a Message by ID
@@ -122,10 +458,8 @@ def delete_message(message_id: int, db_path: pathlib.Path) -> None:
     - db_path (pathlib.Path): Path to the SQLite database file.
     """
     try:
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM streamed_messages WHERE id = ?", (message_id,))
-            conn.commit()
+        conn = get_conn(db_path)
+        conn.execute("DELETE FROM streamed_messages WHERE id = ?", (message_id,))
         logger.info(f"Deleted message with id {message_id} from the database.")
     except Exception as e:
         logger.error(f"ERROR: Failed to delete message from the database: {e}")
@@ -145,6 +479,9 @@ def main():
     init_db(TEST_DB_PATH)
     logger.info(f"Initialized database file at {TEST_DB_PATH}.")
 
+    # Index the columns used to look up the test message below
+    create_lookup_index(TEST_DB_PATH)
+
     # Test message
     test_message = {
         "message": "I have a dream.",
@@ -161,22 +498,29 @@ def main():
 
     # Retrieve the ID of the inserted message
     try:
-        with sqlite3.connect(TEST_DB_PATH, timeout=1.0) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT id FROM streamed_messages WHERE message = ? AND author = ?",
-                (test_message["message"], test_message["author"]),
-            )
-            row = cursor.fetchone()
-            if row:
-                test_message_id = row[0]
-                # Delete test message
-                delete_message(test_message_id, TEST_DB_PATH)
-            else:
-                logger.warning("Test message not found; nothing to delete.")
+        conn = get_conn(TEST_DB_PATH)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id FROM streamed_messages WHERE message = ? AND author = ?",
+            (test_message["message"], test_message["author"]),
+        )
+        row = cursor.fetchone()
+        if row:
+            test_message_id = row[0]
+            # Delete test message
+            delete_message(test_message_id, TEST_DB_PATH)
+        else:
+            logger.warning("Test message not found; nothing to delete.")
     except Exception as e:
         logger.error(f"ERROR: Failed to retrieve or delete test message: {e}")
 
+    # Each statement should be a single cache miss (one compile);
+    # repeated executions show up as hits
+    try:
+        logger.info(f"Statement cache: {get_conn(TEST_DB_PATH).cache_stats()}")
+    except Exception as e:
+        logger.error(f"ERROR: Failed to read statement cache stats: {e}")
+
     logger.info("Finished testing.")
 
 #####################################
@@ -4,6 +4,15 @@ consumer_yourname.py
 Consumes JSON messages from a live data file.
 Processes the messages and stores them in an SQLite database.
 
+The live data file is JSON Lines (one JSON object per line), as written
+by the producer. Each poll reads only the bytes appended since the last
+poll, so every message is parsed and inserted exactly once. The offset
+is saved in the database with each batch, so a restart resumes where
+the previous run stopped.
+
+If the watchdog package is installed, the consumer wakes as soon as the
+file changes; otherwise it polls every MESSAGE_INTERVAL_SECONDS.
+
 Example JSON message:
 {
     "message": "I have a dream.",
@@ -19,30 +28,116 @@ Example JSON message:
 # Import Modules
 #####################################
 
-import json
+import hashlib
+import mmap
+import os
 import pathlib
 import sys
+import threading
 import time
-import sqlite3
+from bisect import bisect_right
+from collections import Counter
+from operator import itemgetter
+import matplotlib
+import orjson
+
+# Non-interactive backend: render straight to file, no GUI event loop
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt  # Import for chart generation
 
+# Optional: watch the live data file for writes instead of blind polling
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = None
+    Observer = None
+
 # Local modules
 import utils.utils_config as config
 from utils.utils_logger import logger
-from consumers.db_sqlite_case import init_db, insert_message
+from consumers.db_sqlite_case import (
+    init_db,
+    insert_rows_bulk,
+    get_conn,
+    get_read_offset,
+    count_length_categories,
+)
+
+# Minimum seconds between chart renders, independent of the poll interval
+CHART_INTERVAL_SECS = 30
 
 #####################################
 # Helper Function: Categorize Message Length
 #####################################
 
+# Upper bounds (exclusive) for Short and Medium; anything longer is Long
+_LEN_THRESHOLDS = (20, 50)
+_LEN_LABELS = ("Short", "Medium", "Long")
+
 def categorize_message_length(message_length):
     """Categorizes messages as Short, Medium, or Long based on length."""
-    if message_length < 20:
-        return "Short"
-    elif message_length < 50:
-        return "Medium"
-    else:
-        return "Long"
+    return _LEN_LABELS[bisect_right(_LEN_THRESHOLDS, message_length)]
+
+#####################################
+# Function to Process a Single Message into a Row
+#####################################
+
+# Defaults for missing fields, in database column order
+_MESSAGE_DEFAULTS = {
+    "message": "",
+    "author": "Unknown",
+    "timestamp": "",
+    "category": "Uncategorized",
+    "keyword_mentioned": "None",
+    "message_length": 0,
+}
+_ROW_FIELDS = (*_MESSAGE_DEFAULTS, "length_category")
+_get_fields = itemgetter(*_MESSAGE_DEFAULTS)
+
+# Field value types SQLite can bind directly
+_BINDABLE_TYPES = frozenset({str, int, float, type(None)})
+
+def process_to_row(message: dict) -> tuple:
+    """
+    Process and transform a single JSON message into a database row.
+    Fills in missing fields and converts message_length to an integer.
+
+    Args:
+        message (dict): JSON message.
+
+    Returns:
+        tuple: Row in database column order (see _ROW_FIELDS),
+        or None if an error occurs.
+    """
+    try:
+        # Fast path: one C-level lookup when every field is present
+        try:
+            fields = _get_fields(message)
+        except KeyError:
+            fields = tuple(message.get(key, default) for key, default in _MESSAGE_DEFAULTS.items())
+        text, author, timestamp, category, keyword, message_length = fields
+
+        # Nested values (dicts, lists) cannot be stored; reject them here.
+        # message_length is checked by int() below.
+        if not (
+            type(text) in _BINDABLE_TYPES
+            and type(author) in _BINDABLE_TYPES
+            and type(timestamp) in _BINDABLE_TYPES
+            and type(category) in _BINDABLE_TYPES
+            and type(keyword) in _BINDABLE_TYPES
+        ):
+            raise TypeError(f"unsupported value type in fields {fields!r}")
+        message_length = int(message_length)  # Ensure message_length is an integer
+
+        # Same lookup as categorize_message_length(), inlined for the hot path
+        length_category = _LEN_LABELS[bisect_right(_LEN_THRESHOLDS, message_length)]
+
+        return (text, author, timestamp, category, keyword, message_length, length_category)
+
+    except Exception as e:
+        logger.error(f"Error processing message: {e}")
+        return None
 
 #####################################
 # Function to Process a Single Message
@@ -52,6 +147,7 @@ def process_message(message: dict) -> dict:
     """
     Process and transform a single JSON message.
     Converts message fields to appropriate data types.
+    Kept for callers that want a dict; the consumer uses process_to_row().
 
     Args:
         message (dict): JSON message.
@@ -59,26 +155,175 @@ def process_message(message: dict) -> dict:
     Returns:
         dict: Processed message or None if an error occurs.
     """
-    try:
-        message_length = int(message.get("message_length", 0))  # Ensure message_length is an integer
+    row = process_to_row(message)
+    if row is None:
+        return None
+    return dict(zip(_ROW_FIELDS, row))
+
+#####################################
+# Generator: Process Messages into Rows for a Batch Insert
+#####################################
 
-        processed_message = {
-            "author": message.get("author", "Unknown"),
-            "timestamp": message.get("timestamp", ""),
-            "message": message.get("message", ""),
-            "category": message.get("category", "Uncategorized"),
-            "keyword_mentioned": message.get("keyword_mentioned", "None"),
-            "message_length": message_length,
-            "length_category": categorize_message_length(message_length)  # Store message length category
-        }
+def iter_rows(messages, length_categories):
+    """
+    Lazily turn raw messages into database rows for a batch insert.
+    Skips messages that fail processing and collects length categories.
+
+    Args:
+        messages (iterable): Raw JSON messages (dicts).
+        length_categories (list): Receives each row's length category,
+            to be counted once the batch is committed.
 
-        logger.info(f"Processed message: {processed_message}")
-        return processed_message
+    Yields:
+        tuple: Each successfully processed row.
+    """
+    for message in messages:
+        row = process_to_row(message)
+        if row:
+            # length_category is the last column
+            length_categories.append(row[-1])
+
+            yield row
 
+#####################################
+# Identify the Live Data File
+#####################################
+
+def get_file_id(file):
+    """
+    Identify the file behind an open handle, so a saved offset is only
+    reused for the same file. The producer deletes and recreates the live
+    data file on every start, and the new file can reuse the old inode
+    number, so the hash of the first complete line is included too.
+
+    Args:
+        file (BinaryIO): Live data file opened in binary mode.
+
+    Returns:
+        str: "<st_dev>:<st_ino>:<first line hash>" (hash empty if no
+        complete line has been written yet).
+    """
+    stat = os.fstat(file.fileno())
+    file.seek(0)
+    first_line = file.readline()
+    first_line_hash = hashlib.sha1(first_line).hexdigest() if first_line.endswith(b"\n") else ""
+    return f"{stat.st_dev}:{stat.st_ino}:{first_line_hash}"
+
+#####################################
+# Find the Unread Range of the Live Data File
+#####################################
+
+def get_new_data_range(file, last_offset):
+    """
+    Find the byte range of complete lines appended since last_offset.
+    A trailing line without a newline is still being written and is left
+    for the next read.
+
+    Args:
+        file (BinaryIO): Live data file opened in binary mode.
+        last_offset (int): Byte offset where the previous read stopped.
+
+    Returns:
+        tuple: (start, end) byte offsets of the unread complete lines.
+    """
+    # Start over if the file shrank in place
+    size = file.seek(0, os.SEEK_END)
+    if size < last_offset:
+        logger.warning("Live data file was truncated; reading from the start.")
+        last_offset = 0
+
+    # Scan backwards from the end for the last newline
+    pos = size
+    while pos > last_offset:
+        chunk_start = max(last_offset, pos - 4096)
+        file.seek(chunk_start)
+        newline_index = file.read(pos - chunk_start).rfind(b"\n")
+        if newline_index != -1:
+            return last_offset, chunk_start + newline_index + 1
+        pos = chunk_start
+
+    return last_offset, last_offset
+
+#####################################
+# Generator: Stream New Messages from Live Data File
+#####################################
+
+def iter_new_messages(file, start, end):
+    """
+    Lazily parse the JSON Lines between start and end, one at a time,
+    so memory stays flat no matter how much was appended.
+
+    The file is memory-mapped and each line is handed to orjson as a
+    zero-copy memoryview slice.
+
+    Args:
+        file (BinaryIO): Live data file opened in binary mode.
+        start (int): Byte offset of the first unread line.
+        end (int): Byte offset just past the last complete line.
+
+    Yields:
+        dict: Each parsed JSON message.
+    """
+    if end <= start:
+        return
+
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+        pos = start
+        while pos < end:
+            newline = mm.find(b"\n", pos, end)
+            if newline == -1:
+                newline = end
+            try:
+                yield orjson.loads(view[pos:newline])
+            except orjson.JSONDecodeError as e:
+                # Blank lines are expected; anything else is bad data
+                if mm[pos:newline].strip():
+                    logger.error(f"ERROR: Skipping invalid JSON line in live data file: {e}")
+            pos = newline + 1
+
+#####################################
+# Start a Watcher for the Live Data File
+#####################################
+
+def start_file_watcher(live_data_path, file_changed):
+    """
+    Watch the live data file and set file_changed whenever it is
+    created or modified. Only the event is signaled from the watcher
+    thread; reading and inserting stay on the consumer thread.
+
+    Args:
+        live_data_path (pathlib.Path): Path to the live data file.
+        file_changed (threading.Event): Event to set on each change.
+
+    Returns:
+        Observer: The running observer, or None if watching is unavailable.
+    """
+    if Observer is None:
+        logger.warning("watchdog is not installed; polling for new messages instead.")
+        return None
+
+    watch_dir = str(pathlib.Path(live_data_path).resolve().parent)
+    target = os.path.join(watch_dir, pathlib.Path(live_data_path).name)
+
+    # Only writes count; open/close events would fire on our own reads
+    class LiveFileHandler(FileSystemEventHandler):
+        def _signal(self, event):
+            if target in (event.src_path, getattr(event, "dest_path", None)):
+                file_changed.set()
+
+        on_created = on_modified = on_moved = _signal
+
+    try:
+        observer = Observer()
+        observer.schedule(LiveFileHandler(), watch_dir, recursive=False)
+        observer.start()
     except Exception as e:
-        logger.error(f"Error processing message: {e}")
+        logger.warning(f"WARNING: Could not watch {watch_dir}; polling instead: {e}")
         return None
 
+    logger.info(f"Watching {target} for new messages.")
+    return observer
+
 #####################################
 # Consume Messages from Live Data File
 #####################################
@@ -98,41 +343,108 @@ def consume_messages_from_file(live_data_path, sql_path, interval_secs):
     # Initialize database
     init_db(sql_path)
 
-    message_lengths = {"Short": 0, "Medium": 0, "Long": 0}  # Track message length categories
+    # Open one connection and reuse it for every insert
+    conn = get_conn(sql_path)
 
-    while True:
-        try:
-            with open(live_data_path, "r", encoding="utf-8") as file:
-                messages = json.load(file)  # Read entire JSON file
-
-            for message in messages:
-                processed_message = process_message(message)
-                if processed_message:
-                    insert_message(processed_message, sql_path)
-                    logger.info(f"Inserted message into database: {processed_message}")
-
-                    # Track message length distribution
-                    length_category = processed_message["length_category"]
-                    message_lengths[length_category] += 1
-
-            # Generate a chart after processing messages
-            generate_chart(message_lengths)
-
-            logger.info("Waiting for new messages...")
-            time.sleep(interval_secs)  # Wait before checking for new messages
-
-        except FileNotFoundError:
-            logger.error(f"ERROR: Live data file not found at {live_data_path}.")
-            time.sleep(interval_secs)
-            continue  # Skip this iteration
-        except json.JSONDecodeError as e:
-            logger.error(f"ERROR: Invalid JSON format in live data file: {e}")
-            time.sleep(interval_secs)
-            continue  # Skip this iteration
-        except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            time.sleep(interval_secs)
-            continue  # Skip this iteration
+    # Track message length categories, starting from what is already stored
+    message_lengths = Counter({"Short": 0, "Medium": 0, "Long": 0})
+    message_lengths.update(count_length_categories(sql_path))
+
+    # Byte offset of the first unread line, resumed from the last run
+    # only if the live data file is still the same file
+    source = str(pathlib.Path(live_data_path).resolve())
+    last_offset, file_id = get_read_offset(source, sql_path)
+    last_chart_time = 0.0  # time.monotonic() of the last chart render
+
+    # Set by the watcher on each write; never set when polling
+    file_changed = threading.Event()
+    observer = start_file_watcher(live_data_path, file_changed)
+
+    try:
+        while True:
+            try:
+                with open(live_data_path, "rb") as file:
+                    # No saved identity (older database): trust the saved offset
+                    current_file_id = get_file_id(file)
+                    if file_id is not None and current_file_id != file_id and last_offset:
+                        logger.warning("Live data file was replaced; reading from the start.")
+                        last_offset = 0
+                    start, end = get_new_data_range(file, last_offset)
+
+                    # The first line may have completed since get_file_id() ran;
+                    # never save an offset past it under a hashless identity
+                    if end and current_file_id.endswith(":"):
+                        current_file_id = get_file_id(file)
+
+                    # Stream everything read this cycle into one transaction,
+                    # saving the new offset with it
+                    length_categories = []
+                    skipped_rows = []
+                    committed = True
+                    if end != last_offset:
+                        # Re-readable, so a failed batch can be retried row by row
+                        def batch_rows():
+                            length_categories.clear()
+                            messages = iter_new_messages(file, start, end)
+                            return iter_rows(messages, length_categories)
+
+                        committed = insert_rows_bulk(
+                            batch_rows(),
+                            sql_path,
+                            conn,
+                            source=source,
+                            byte_offset=end,
+                            file_id=current_file_id,
+                            retry_rows=batch_rows,
+                            skipped_rows=skipped_rows,
+                        )
+
+                # Only move past these lines once they are stored (or skipped as
+                # bad rows); a batch that hit a database error is read again
+                # from the same offset next cycle
+                if committed:
+                    last_offset = end
+                    file_id = current_file_id
+
+                    # Count the whole batch at once, only rows that were stored
+                    message_lengths.update(length_categories)
+                    message_lengths.subtract(row[-1] for row in skipped_rows)
+
+                # Rendering is slow, so regenerate the chart at most every CHART_INTERVAL_SECS
+                now = time.monotonic()
+                if now - last_chart_time >= CHART_INTERVAL_SECS:
+                    generate_chart(message_lengths)
+                    last_chart_time = now
+
+                # Wake early on a file change; interval_secs is the fallback
+                logger.info("Waiting for new messages...")
+                file_changed.wait(interval_secs)
+                file_changed.clear()
+
+            except FileNotFoundError:
+                logger.error(f"ERROR: Live data file not found at {live_data_path}.")
+                file_changed.wait(interval_secs)  # The watcher also signals creation
+                file_changed.clear()
+                continue  # Skip this iteration
+            except Exception as e:
+                logger.error(f"Unexpected error: {e}")
+                time.sleep(interval_secs)
+                continue  # Skip this iteration
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+#####################################
+# Chart Figure (built once, reused on every render)
+#####################################
+
+_FIG, _AX = plt.subplots(figsize=(8, 5))
+_BARS = _AX.bar(_LEN_LABELS, [0, 0, 0], color=["green", "blue", "red"])
+_AX.set_xlabel("Message Length Category")
+_AX.set_ylabel("Number of Messages")
+_AX.set_title("Message Length Distribution")
+_AX.grid(axis="y", linestyle="--", alpha=0.7)
 
 #####################################
 # Function to Generate Chart
@@ -141,23 +453,18 @@ def consume_messages_from_file(live_data_path, sql_path, interval_secs):
 def generate_chart(message_lengths):
     """
     Generates a bar chart for message length categories.
+    Updates the bar heights on the shared figure and re-saves it.
 
     Args:
         message_lengths (dict): Dictionary containing count of Short, Medium, and Long messages.
     """
-    categories = list(message_lengths.keys())
-    counts = list(message_lengths.values())
-
-    plt.figure(figsize=(8, 5))
-    plt.bar(categories, counts, color=["green", "blue", "red"])
-    plt.xlabel("Message Length Category")
-    plt.ylabel("Number of Messages")
-    plt.title("Message Length Distribution")
-    plt.grid(axis="y", linestyle="--", alpha=0.7)
+    for bar, category in zip(_BARS, _LEN_LABELS):
+        bar.set_height(message_lengths.get(category, 0))
+    _AX.relim()
+    _AX.autoscale_view()
 
     # Save the chart as an image
-    plt.savefig("message_length_distribution.png")
-    plt.close()
+    _FIG.savefig("message_length_distribution.png")
 
     logger.info("Chart generated: message_length_distribution.png")
 
@@ -40,7 +40,7 @@ from utils.utils_producer import verify_services, is_topic_available
 
 # Ensure the parent directory is in sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from consumers.db_sqlite_case import init_db, insert_message
+from consumers.db_sqlite_case import init_db, insert_message, delete_db_files
 
 #####################################
 # Function to process a single message
@@ -181,13 +181,13 @@ def main():
         sys.exit(1)
 
     logger.info("STEP 2. Delete any prior database file for a fresh start.")
-    if sqlite_path.exists():
-        try:
-            sqlite_path.unlink()
-            logger.info("SUCCESS: Deleted database file.")
-        except Exception as e:
-            logger.error(f"ERROR: Failed to delete DB file: {e}")
-            sys.exit(2)
+    try:
+        # Includes the -wal/-shm sidecars, so a stale WAL is not replayed
+        delete_db_files(sqlite_path)
+        logger.info("SUCCESS: Deleted database file.")
+    except Exception as e:
+        logger.error(f"ERROR: Failed to delete DB file: {e}")
+        sys.exit(2)
 
     logger.info("STEP 3. Initialize a new database with an empty table.")
     try: